@@ -0,0 +1,3 @@
+# Lets the tests import sec_scraper from the repository root: pytest puts the
+# directory of a rootdir conftest.py on sys.path, and the module isn't
+# installed by setup.py (find_packages() finds nothing).
@@ -6,80 +6,354 @@ With rate limiting to comply with SEC guidelines
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import io
 import json
 import time
 import re
 import os
-from typing import Dict, List, Optional
-from datetime import datetime
+import threading
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
 import pandas as pd
+import ijson
+import orjson
+from diskcache import Cache
+from lxml import etree
 from ratelimit import limits, sleep_and_retry
 
+# Local cache for large, rarely-changing SEC files
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'vc-scraper')
+
+# Keywords that indicate investment firms (matched anywhere in the name)
+INVESTMENT_KEYWORDS = (
+    'capital', 'venture', 'partners', 'investment', 'fund',
+    'equity', 'management', 'advisors', 'advisory', 'holdings',
+    'asset', 'wealth', 'family office', 'trust',
+)
+INVESTMENT_KEYWORDS_RE = re.compile(
+    '|'.join(map(re.escape, INVESTMENT_KEYWORDS)), re.IGNORECASE
+)
+
+# Investor type rules in order of precedence. Each category is a lookahead
+# anchored at the start, so the engine tries them in order instead of
+# returning whichever keyword appears first in the text.
+INVESTOR_TYPE_RE = re.compile(
+    r'^(?:'
+    r'(?=.*?(?P<family_office>family|office|trust|estate))'
+    r'|(?=.*?(?P<venture_capital>venture|ventures|seed|startup))'
+    r'|(?=.*?(?P<private_equity>private equity|buyout|leveraged))'
+    r'|(?=.*?(?P<hedge_fund>hedge|offshore|alternative))'
+    r'|(?=.*?(?P<asset_management>asset management|wealth|advisory))'
+    r'|(?=.*?(?P<investment_company>capital|partners|fund|investment))'
+    r')',
+    re.IGNORECASE | re.DOTALL,
+)
+INVESTOR_TYPES = {
+    'family_office': 'Family Office',
+    'venture_capital': 'Venture Capital',
+    'private_equity': 'Private Equity',
+    'hedge_fund': 'Hedge Fund',
+    'asset_management': 'Asset Management',
+    'investment_company': 'Investment Company',
+}
+
+# US state codes
+STATE_CODES = frozenset({
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+    'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+    'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+    'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY', 'DC',
+})
+# Two capitals right before a ZIP code, the usual spot in SEC addresses
+STATE_ZIP_RE = re.compile(r'\b([A-Z]{2})\s+\d{5}')
+
+# Atom feed parsing
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+CIK_RE = re.compile(r'CIK=(\d+)')
+FORM_SUFFIX_RE = re.compile(r'\s*(?:\(13F-HR.*?\)|13F-HR.*)\s*$')
+
+def _json(response: requests.Response):
+    """Parse a JSON response body straight from bytes"""
+    return orjson.loads(response.content)
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta or HTTP date), if any"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
 class SECFormADVScraper:
     """Scrape investment adviser data from SEC EDGAR with rate limiting"""
 
     # SEC rate limit: 10 requests per second max
     SEC_RATE_LIMIT = 10
     SEC_CALLS_PER_SECOND = 10  # Comply with SEC guidelines
+    MAX_WORKERS = 10  # Concurrent detail requests
+    MAX_RETRIES = 3  # Extra attempts for throttled/transient responses
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    POOL_SIZE = 20  # Keep-alive connections per host
+
+    def __init__(self, burst: int = 1):
+        """
+        burst caps how many requests may go out back-to-back after an idle
+        period. The default of 1 spaces requests evenly so no 1-second window
+        exceeds SEC_CALLS_PER_SECOND; larger values trade that for bursts.
+        """
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
 
-    def __init__(self):
         self.base_url = "https://www.sec.gov"
         self.headers = {
             'User-Agent': 'VC Intelligence Research yoshi@example.com',
             'Accept': 'application/json, text/html, application/xml',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': 'gzip, deflate, br',
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+
+        # urllib3 only retries failed connections, which never reach SEC.
+        # Status retries (429/5xx) happen in _get so each attempt is rate limited.
+        retry = Retry(
+            total=3,
+            connect=3,
+            read=0,
+            status=0,
+            backoff_factor=0.5,
+            respect_retry_after_header=False,
+        )
+
+        # Keep enough pooled connections for every worker so concurrent
+        # requests reuse sockets instead of paying a new TLS handshake.
+        # The adapter keeps a separate pool per host, so data.sec.gov
+        # lookups get their own POOL_SIZE connections.
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_SIZE,
+            pool_maxsize=self.POOL_SIZE,
+            max_retries=retry,
+        )
+        self.session.mount('https://', adapter)
         
-        # Rate limiting state
-        self.request_times = []
-        self.min_request_interval = 1.0 / self.SEC_CALLS_PER_SECOND
+        # Rate limiting state (token bucket)
+        self._rate = float(self.SEC_CALLS_PER_SECOND)
+        self._capacity = float(burst)
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Submissions change at most daily, so details are cached per (CIK, day).
+        # Opened on first use so scrapers that never fetch details don't touch disk.
+        self._cache = None
+        self._cache_failed = False
+        self._cache_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the HTTP session and the calling thread's cache connection"""
+        self.session.close()
+        with self._cache_lock:
+            if self._cache is not None:
+                self._cache.close()
+                self._cache = None
+
+    def _details_cache(self) -> Optional[Cache]:
+        """Open the submissions cache on first use; None if it can't be opened"""
+        with self._cache_lock:
+            if self._cache is None and not self._cache_failed:
+                try:
+                    self._cache = Cache(os.path.join(CACHE_DIR, 'submissions'))
+                    # Drop the setup connection; lookups open their own below
+                    self._cache.close()
+                except (OSError, sqlite3.Error) as e:
+                    # The cache is best-effort: carry on fetching from SEC
+                    print(f"   ⚠️ Details cache unavailable, fetching without it: {e}")
+                    self._cache_failed = True
+            return self._cache
+
+    def _cached_details(self, key) -> Optional[Dict]:
+        """Look up cached details, treating cache errors as a miss"""
+        cache = self._details_cache()
+        if cache is None:
+            return None
+
+        try:
+            # diskcache keeps one SQLite connection per thread and close() only
+            # releases the caller's, so scope the connection to this lookup
+            with cache:
+                return cache.get(key)
+        except (OSError, sqlite3.Error) as e:
+            print(f"   ⚠️ Could not read details cache: {e}")
+            return None
+
+    def _store_details(self, key, details: Dict):
+        """Cache details for a day, ignoring cache errors"""
+        cache = self._details_cache()
+        if cache is None:
+            return
+
+        try:
+            # Expire after a day so stale keys don't pile up
+            with cache:
+                cache.set(key, details, expire=24 * 60 * 60)
+        except (OSError, sqlite3.Error) as e:
+            print(f"   ⚠️ Could not write details cache: {e}")
 
     def _rate_limit(self):
         """Apply rate limiting to comply with SEC guidelines"""
-        current_time = time.time()
-        
-        # Remove old request times (older than 1 second)
-        self.request_times = [t for t in self.request_times if current_time - t < 1.0]
-        
-        # If we've made too many requests, wait
-        if len(self.request_times) >= self.SEC_CALLS_PER_SECOND:
-            sleep_time = 1.0 - (current_time - self.request_times[0])
-            if sleep_time > 0:
-                print(f"   ⏳ Rate limiting: waiting {sleep_time:.2f}s...")
-                time.sleep(sleep_time)
-        
-        # Record this request
-        self.request_times.append(time.time())
+        with self._lock:
+            now = time.monotonic()
+
+            # Refill tokens for the time elapsed since the last request
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+
+            # Take a token; a negative balance reserves a slot in the future
+            # so the wait isn't credited twice.
+            self._tokens -= 1
+            sleep_time = -self._tokens / self._rate if self._tokens < 0 else 0
+
+        # Sleep outside the lock so other workers can reserve their slots
+        if sleep_time > 0:
+            time.sleep(sleep_time)
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """Rate-limited GET that retries throttled/transient responses"""
+        for attempt in range(self.MAX_RETRIES + 1):
+            self._rate_limit()  # Every attempt, retries included, takes a token
+            response = self.session.get(url, **kwargs)
+
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.MAX_RETRIES:
+                return response
+
+            # Honour SEC's Retry-After, else back off exponentially (0.5s, 1s, 2s)
+            delay = _retry_after(response)
+            if delay is None:
+                delay = 0.5 * 2 ** attempt
+            response.close()
+            time.sleep(delay)
+
+    def _open_cached(self, url: str, filename: str) -> BinaryIO:
+        """
+        Fetch a URL through the local cache, revalidating with its ETag, and
+        return the body as a binary stream. The cache is best-effort: if it
+        can't be read or written, the response body is used directly.
+        """
+        cache_path = os.path.join(CACHE_DIR, filename)
+        etag_path = f"{cache_path}.etag"
+
+        headers = {}
+        try:
+            if os.path.exists(cache_path) and os.path.exists(etag_path):
+                with open(etag_path) as f:
+                    headers['If-None-Match'] = f.read().strip()
+        except OSError:
+            headers = {}
+
+        with self._get(url, headers=headers, timeout=30, stream=True) as response:
+            # Unchanged since the last run: reuse the cached body
+            if response.status_code == 304:
+                try:
+                    return open(cache_path, 'rb')
+                except OSError as e:
+                    print(f"   ⚠️ Could not read cached {filename}, downloading again: {e}")
+                    return io.BytesIO(self._fetch_uncached(url))
 
-    def get_company_tickers(self) -> List[Dict]:
-        """Get list of all companies from SEC company tickers JSON"""
+            response.raise_for_status()
+
+            tmp_path = f"{cache_path}.tmp"
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp = open(tmp_path, 'wb')
+            except OSError as e:
+                # Nothing has been read yet, so decode the body as is
+                print(f"   ⚠️ Could not cache {filename}, using the response directly: {e}")
+                return io.BytesIO(response.content)
+
+            # Stream the body to disk so it is never held in memory
+            try:
+                with tmp:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        tmp.write(chunk)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                # Part of the body went into the failed write, so fetch it again
+                print(f"   ⚠️ Could not cache {filename}, downloading it uncached: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return io.BytesIO(self._fetch_uncached(url))
+
+            try:
+                etag = response.headers.get('ETag')
+                if etag:
+                    with open(etag_path, 'w') as f:
+                        f.write(etag)
+                elif os.path.exists(etag_path):
+                    os.remove(etag_path)
+            except OSError as e:
+                # Without a matching ETag the next run just downloads again
+                print(f"   ⚠️ Could not save ETag for {filename}: {e}")
+                try:
+                    os.remove(etag_path)
+                except OSError:
+                    pass
+
+        return open(cache_path, 'rb')
+
+    def _fetch_uncached(self, url: str) -> bytes:
+        """Download a URL body without touching the cache"""
+        response = self._get(url, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    def get_company_tickers(self, predicate: Optional[Callable[[str], bool]] = None) -> Iterator[Dict]:
+        """
+        Stream companies from SEC company tickers JSON, optionally only those
+        whose name satisfies predicate
+        """
         print("📡 Fetching company list from SEC...")
 
         # SEC provides a JSON file with all company tickers
         url = "https://www.sec.gov/files/company_tickers.json"
 
         try:
-            self._rate_limit()  # Apply rate limiting
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-
-            companies = []
-            for key, company in data.items():
-                companies.append({
-                    'cik': str(company['cik_str']),
-                    'name': company['title'],
-                    'ticker': company.get('ticker', '')
-                })
-
-            print(f"✅ Found {len(companies)} companies")
-            return companies
+            # Decode one company at a time instead of the full ~13k-entry dict
+            with self._open_cached(url, 'company_tickers.json') as f:
+                for _key, company in ijson.kvitems(f, ''):
+                    # Filter before building our record so rejected rows are dropped early
+                    if predicate is not None and not predicate(company['title']):
+                        continue
+
+                    yield {
+                        'cik': str(company['cik_str']),
+                        'name': company['title'],
+                        'ticker': company.get('ticker', '')
+                    }
 
         except Exception as e:
             print(f"❌ Error fetching company list: {e}")
-            return []
 
     def get_investment_advisers(self, limit: int = 200) -> List[Dict]:
         """
@@ -87,33 +361,19 @@ class SECFormADVScraper:
         """
         print(f"🔍 Searching for investment advisers (limit: {limit})...")
 
-        companies = self.get_company_tickers()
-
-        # Keywords that indicate investment firms
-        investment_keywords = [
-            'capital', 'venture', 'partners', 'investment', 'fund',
-            'equity', 'management', 'advisors', 'advisory', 'holdings',
-            'asset', 'wealth', 'family office', 'trust'
-        ]
-
         advisers = []
+        scraped_at = datetime.now().isoformat()  # One timestamp for the whole scrape
+        is_investment_name = INVESTMENT_KEYWORDS_RE.search  # Hoisted out of the hot loop
 
-        for company in companies:
-            name_lower = company['name'].lower()
-
-            # Check if company name contains investment-related keywords
-            if any(kw in name_lower for kw in investment_keywords):
-                adviser = {
-                    'cik': company['cik'],
-                    'name': company['name'],
-                    'ticker': company.get('ticker', ''),
-                    'sec_url': f"https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={company['cik']}",
-                    'scraped_at': datetime.now().isoformat()
-                }
-                advisers.append(adviser)
+        # Only companies with investment-related keywords in their name become
+        # records, and stopping at the limit skips the rest of the file
+        for adviser in self.get_company_tickers(predicate=is_investment_name):
+            adviser['sec_url'] = f"https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={adviser['cik']}"
+            adviser['scraped_at'] = scraped_at
+            advisers.append(adviser)
 
-                if len(advisers) >= limit:
-                    break
+            if len(advisers) >= limit:
+                break
 
         print(f"✅ Found {len(advisers)} potential investment advisers")
         return advisers
@@ -137,6 +397,7 @@ class SECFormADVScraper:
         }
 
         holders = []
+        scraped_at = datetime.now().isoformat()  # One timestamp for the whole scrape
 
         try:
             # Alternative: Use the company search
@@ -151,36 +412,45 @@ class SECFormADVScraper:
                 'output': 'atom'
             }
 
-            self._rate_limit()  # Apply rate limiting
-            response = self.session.get(search_url, params=params, timeout=30)
-
-            if response.status_code == 200:
-                content = response.text
-
-                # Parse Atom feed for company info
-                # Extract entries
-                entries = re.findall(r'<entry>(.*?)</entry>', content, re.DOTALL)
-
-                for entry in entries[:limit]:
-                    # Extract company name
-                    name_match = re.search(r'<title[^>]*>([^<]+)</title>', entry)
-                    cik_match = re.search(r'CIK=(\d+)', entry)
-
-                    if name_match and cik_match:
-                        name = name_match.group(1).strip()
-                        cik = cik_match.group(1)
-
-                        # Clean up name (remove form type suffix)
-                        name = re.sub(r'\s*\(13F-HR.*?\)\s*$', '', name)
-                        name = re.sub(r'\s*13F-HR.*$', '', name)
-
-                        holders.append({
-                            'cik': cik,
-                            'name': name.strip(),
-                            'filing_type': '13F-HR',
-                            'sec_url': f"https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={cik}&type=13F-HR",
-                            'scraped_at': datetime.now().isoformat()
-                        })
+            with self._get(search_url, params=params, timeout=30, stream=True) as response:
+                if response.status_code == 200:
+                    # Parse Atom entries as they arrive instead of buffering the feed
+                    response.raw.decode_content = True
+                    entries = etree.iterparse(
+                        response.raw, events=('end',), tag=f'{ATOM_NS}entry'
+                    )
+
+                    for _, entry in entries:
+                        # Extract company name and CIK
+                        name = entry.findtext(f'{ATOM_NS}title')
+                        cik_match = None
+                        for link in entry.iterfind(f'{ATOM_NS}link'):
+                            cik_match = CIK_RE.search(link.get('href', ''))
+                            if cik_match:
+                                break
+
+                        if name and cik_match:
+                            name = name.strip()
+                            cik = cik_match.group(1)
+
+                            # Clean up name (remove form type suffix)
+                            name = FORM_SUFFIX_RE.sub('', name)
+
+                            holders.append({
+                                'cik': cik,
+                                'name': name.strip(),
+                                'filing_type': '13F-HR',
+                                'sec_url': f"https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={cik}&type=13F-HR",
+                                'scraped_at': scraped_at
+                            })
+
+                        # Free parsed entries so memory stays bounded
+                        entry.clear()
+                        while entry.getprevious() is not None:
+                            del entry.getparent()[0]
+
+                        if len(holders) >= limit:
+                            break
 
             print(f"✅ Found {len(holders)} 13F filers")
 
@@ -192,84 +462,87 @@ class SECFormADVScraper:
     def get_adviser_details(self, cik: str) -> Optional[Dict]:
         """Get detailed company information from SEC with rate limiting"""
 
-        # Apply rate limiting
-        self._rate_limit()
+        # Reruns on the same day are served from disk without a request
+        cache_key = (cik, date.today().isoformat())
+        cached = self._cached_details(cache_key)
+        if cached is not None:
+            return cached
 
         # Use SEC's company facts API
         cik_padded = cik.zfill(10)
         url = f"https://data.sec.gov/submissions/CIK{cik_padded}.json"
 
         try:
-            response = self.session.get(url, timeout=15)
+            response = self._get(url, timeout=15)
+            response.raise_for_status()  # 403/404 etc. are logged below
 
-            if response.status_code == 200:
-                data = response.json()
+            data = _json(response)
 
-                addresses = data.get('addresses', {})
-                business = addresses.get('business', {})
+            addresses = data.get('addresses') or {}
+            business = addresses.get('business') or {}
 
-                return {
-                    'address': f"{business.get('street1', '')} {business.get('street2', '')}, {business.get('city', '')}, {business.get('stateOrCountry', '')} {business.get('zipCode', '')}".strip(),
-                    'city': business.get('city', ''),
-                    'state': business.get('stateOrCountry', ''),
-                    'phone': data.get('phone', ''),
-                    'sic': data.get('sic', ''),
-                    'sic_description': data.get('sicDescription', ''),
-                }
+            details = {
+                'address': f"{business.get('street1', '')} {business.get('street2', '')}, {business.get('city', '')}, {business.get('stateOrCountry', '')} {business.get('zipCode', '')}".strip(),
+                'city': business.get('city', ''),
+                'state': business.get('stateOrCountry', ''),
+                'phone': data.get('phone', ''),
+                'sic': data.get('sic', ''),
+                'sic_description': data.get('sicDescription', ''),
+            }
 
-        except Exception as e:
-            pass
+            self._store_details(cache_key, details)
+            return details
+
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
+            print(f"   ⚠️ Could not fetch details for CIK {cik}: {e}")
 
         return None
 
     def classify_investor_type(self, name: str, sic_desc: str = '') -> str:
         """Classify investor based on name and SIC patterns"""
-        name_lower = name.lower()
-        sic_lower = sic_desc.lower() if sic_desc else ''
-        combined = f"{name_lower} {sic_lower}"
+        combined = f"{name} {sic_desc or ''}"
 
-        # Family office indicators
-        if any(kw in combined for kw in ['family', 'office', 'trust', 'estate']):
-            return 'Family Office'
+        match = INVESTOR_TYPE_RE.match(combined)
+        return INVESTOR_TYPES[match.lastgroup] if match else 'Other Institutional'
 
-        # VC indicators
-        if any(kw in combined for kw in ['venture', 'ventures', 'seed', 'startup']):
-            return 'Venture Capital'
+    def extract_state(self, address: str) -> Optional[str]:
+        """Extract US state code from address"""
+        if not address:
+            return None
 
-        # PE indicators
-        if any(kw in combined for kw in ['private equity', 'buyout', 'leveraged']):
-            return 'Private Equity'
+        # The state is usually near the end, just before the ZIP code
+        for token in reversed(address.replace(',', ' ').split()):
+            if token in STATE_CODES:
+                return token
 
-        # Hedge fund indicators
-        if any(kw in combined for kw in ['hedge', 'offshore', 'alternative']):
-            return 'Hedge Fund'
+        return None
 
-        # Asset management
-        if any(kw in combined for kw in ['asset management', 'wealth', 'advisory']):
-            return 'Asset Management'
+    def classify_investor_types(self, names: pd.Series, sic_descs: pd.Series) -> pd.Series:
+        """Vectorized classify_investor_type over aligned name/SIC columns"""
+        combined = names.fillna('') + ' ' + sic_descs.fillna('')
 
-        # Investment company
-        if any(kw in combined for kw in ['capital', 'partners', 'fund', 'investment']):
-            return 'Investment Company'
+        # One column per category; at most one is set per row
+        matched = combined.str.extract(INVESTOR_TYPE_RE).notna()
 
-        return 'Other Institutional'
+        return (
+            matched.idxmax(axis=1)
+            .map(INVESTOR_TYPES)
+            .where(matched.any(axis=1), 'Other Institutional')
+        )
 
-    def extract_state(self, address: str) -> Optional[str]:
-        """Extract US state code from address"""
-        if not address:
-            return None
+    def extract_states(self, addresses: pd.Series) -> pd.Series:
+        """Vectorized extract_state over an address column"""
+        addresses = addresses.fillna('')
 
-        states = ['AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
-                 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
-                 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
-                 'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
-                 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY', 'DC']
+        # Fast path: the token before the ZIP code, if it is a real state
+        candidates = addresses.str.extract(STATE_ZIP_RE, expand=False)
+        states = candidates.where(candidates.isin(STATE_CODES))
 
-        for state in states:
-            if f' {state} ' in address or f', {state}' in address or address.endswith(f' {state}'):
-                return state
+        # Fall back to a token scan for addresses without a ZIP match
+        missing = states.isna()
+        states[missing] = addresses[missing].map(self.extract_state)
 
-        return None
+        return states
 
 
 def main():
@@ -279,80 +552,81 @@ def main():
     print("=" * 60)
     print()
 
-    scraper = SECFormADVScraper()
-
-    # Collect data
-    all_investors = []
-    seen_ciks = set()
-
-    # Get investment advisers from company list
-    print("\n📊 Phase 1: Investment Advisers from Company Registry")
-    print("-" * 60)
-    advisers = scraper.get_investment_advisers(limit=150)
-
-    for adviser in advisers:
-        if adviser['cik'] not in seen_ciks:
-            seen_ciks.add(adviser['cik'])
-            all_investors.append(adviser)
-
-    # Get 13F holders (institutional investors)
-    print("\n📊 Phase 2: 13F Institutional Holders")
-    print("-" * 60)
-    holders = scraper.get_recent_13f_filers(limit=100)
-
-    for holder in holders:
-        if holder['cik'] not in seen_ciks:
-            seen_ciks.add(holder['cik'])
-            all_investors.append(holder)
-
-    # Enrich with details
-    print("\n📊 Phase 3: Enriching investor data...")
-    print("-" * 60)
-
-    for i, investor in enumerate(all_investors):
-        if i % 20 == 0:
-            print(f"   Processing {i+1}/{len(all_investors)}...")
-            time.sleep(0.2)  # Rate limiting
-
-        details = scraper.get_adviser_details(investor['cik'])
-        if details:
-            investor.update(details)
-
-        # Classify investor type
-        investor['type'] = scraper.classify_investor_type(
-            investor['name'],
-            investor.get('sic_description', '')
-        )
+    with SECFormADVScraper() as scraper:
+        # Get investment advisers from company list
+        print("\n📊 Phase 1: Investment Advisers from Company Registry")
+        print("-" * 60)
+        advisers = scraper.get_investment_advisers(limit=150)
 
-        # Extract state
-        if not investor.get('state'):
-            investor['state'] = scraper.extract_state(investor.get('address', ''))
+        # Get 13F holders (institutional investors)
+        print("\n📊 Phase 2: 13F Institutional Holders")
+        print("-" * 60)
+        holders = scraper.get_recent_13f_filers(limit=100)
 
-    # Create DataFrame
-    df = pd.DataFrame(all_investors)
+        # Merge, keeping the first record seen for each CIK
+        df = pd.concat([pd.DataFrame(advisers), pd.DataFrame(holders)], ignore_index=True)
+        if len(df) > 0:
+            df = df.drop_duplicates('cik', keep='first', ignore_index=True)
 
-    # Summary statistics
-    print("\n" + "=" * 60)
-    print("📈 RESULTS SUMMARY")
-    print("=" * 60)
-    print(f"Total investors found: {len(df)}")
-    print("\nBreakdown by type:")
-    if 'type' in df.columns and len(df) > 0:
-        print(df['type'].value_counts().to_string())
-
-    # Save to CSV
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_file = os.path.join(script_dir, 'vc_database.csv')
-    df.to_csv(output_file, index=False)
-    print(f"\n💾 Data saved to: {output_file}")
-
-    # Show sample records
-    if len(df) > 0:
-        print("\n📋 Sample Records:")
+        # Enrich with details
+        print("\n📊 Phase 3: Enriching investor data...")
         print("-" * 60)
-        print(df[['name', 'type', 'state']].head(10).to_string(index=False))
 
-    return df
+        # Requests are IO-bound; the shared token bucket keeps the pool under SEC's cap
+        details = []
+        with ThreadPoolExecutor(max_workers=scraper.MAX_WORKERS) as executor:
+            results = executor.map(scraper.get_adviser_details, df.get('cik', []))
+
+            for i, result in enumerate(results):
+                if i % 20 == 0:
+                    print(f"   Processing {i+1}/{len(df)}...")
+
+                details.append(result or {})
+
+        if len(df) > 0:
+            # Fixed columns so rows whose lookup failed still get empty detail fields
+            df = df.join(pd.DataFrame(
+                details,
+                index=df.index,
+                columns=['address', 'city', 'state', 'phone', 'sic', 'sic_description'],
+                dtype=object,
+            ))
+
+            # Classify investor type
+            df['type'] = scraper.classify_investor_types(df['name'], df['sic_description'])
+
+            # Extract state where SEC didn't report one
+            df['state'] = df['state'].astype(object)
+            missing = df['state'].isna() | (df['state'] == '')
+            df.loc[missing, 'state'] = scraper.extract_states(df.loc[missing, 'address'])
+
+        # Summary statistics
+        print("\n" + "=" * 60)
+        print("📈 RESULTS SUMMARY")
+        print("=" * 60)
+        print(f"Total investors found: {len(df)}")
+        print("\nBreakdown by type:")
+        if 'type' in df.columns and len(df) > 0:
+            print(df['type'].value_counts().to_string())
+
+        # Save to CSV and Parquet
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        output_file = os.path.join(script_dir, 'vc_database.csv')
+        df.to_csv(output_file, index=False, chunksize=10_000)
+        print(f"\n💾 Data saved to: {output_file}")
+
+        # Columnar copy for downstream analysis
+        parquet_file = os.path.splitext(output_file)[0] + '.parquet'
+        df.to_parquet(parquet_file, engine='pyarrow', compression='zstd', index=False)
+        print(f"💾 Parquet saved to: {parquet_file}")
+
+        # Show sample records
+        if len(df) > 0:
+            print("\n📋 Sample Records:")
+            print("-" * 60)
+            print(df[['name', 'type', 'state']].head(10).to_string(index=False))
+
+        return df
 
 if __name__ == "__main__":
     df = main()
@@ -17,6 +17,12 @@ setup(
     install_requires=[
         "requests>=2.28.0",
         "pandas>=1.5.0",
+        "lxml>=4.9",
+        "ijson>=3.2",
+        "orjson>=3.9",
+        "brotli>=1.0",
+        "pyarrow>=12",
+        "diskcache>=5.4",
     ],
     python_requires=">=3.9",
     classifiers=[
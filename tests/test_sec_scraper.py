@@ -0,0 +1,273 @@
+import io
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+import requests
+
+import sec_scraper
+from sec_scraper import SECFormADVScraper
+
+
+def test_main_writes_csv_when_all_detail_lookups_fail(monkeypatch, tmp_path):
+    monkeypatch.setattr(sec_scraper, '__file__', str(tmp_path / 'sec_scraper.py'))
+    monkeypatch.setattr(SECFormADVScraper, 'get_investment_advisers', lambda self, limit=200: [
+        {'cik': '1', 'name': 'Acme Capital', 'ticker': 'ACME'},
+        {'cik': '2', 'name': 'Plain Corp', 'ticker': 'PLN'},
+    ])
+    monkeypatch.setattr(SECFormADVScraper, 'get_recent_13f_filers', lambda self, limit=100: [
+        {'cik': '3', 'name': 'Family Trust', 'filing_type': '13F-HR'},
+    ])
+    monkeypatch.setattr(SECFormADVScraper, 'get_adviser_details', lambda self, cik: None)
+
+    df = sec_scraper.main()
+
+    assert df['type'].tolist() == ['Investment Company', 'Other Institutional', 'Family Office']
+    assert df['state'].isna().all()
+
+    written = pd.read_csv(tmp_path / 'vc_database.csv', dtype=str)
+    assert written['cik'].tolist() == ['1', '2', '3']
+    assert os.path.exists(tmp_path / 'vc_database.parquet')
+
+
+def _fake_clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(sec_scraper.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(sec_scraper.time, 'sleep', lambda seconds: clock.__setitem__(0, clock[0] + seconds))
+    return clock
+
+
+def _busiest_second(sent):
+    # Count requests in every 1-second window starting at a request
+    return max(sum(start <= t < start + 1.0 - 1e-9 for t in sent) for start in sent)
+
+
+def test_rate_limit_never_exceeds_sec_cap_in_any_second(monkeypatch):
+    clock = _fake_clock(monkeypatch)
+
+    scraper = SECFormADVScraper()
+    sent = []
+    for _ in range(50):
+        scraper._rate_limit()
+        sent.append(clock[0])
+
+    assert _busiest_second(sent) <= SECFormADVScraper.SEC_CALLS_PER_SECOND
+
+
+def test_burst_must_be_positive():
+    with pytest.raises(ValueError):
+        SECFormADVScraper(burst=0)
+
+
+def _response(status_code, body=b''):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = 'https://data.sec.gov/submissions/CIK0000000001.json'
+    response._content = body
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def test_adviser_details_logs_http_errors(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', str(tmp_path))
+    scraper = SECFormADVScraper()
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: _response(403))
+
+    assert scraper.get_adviser_details('1') is None
+    assert 'Could not fetch details for CIK 1' in capsys.readouterr().out
+
+
+def test_adviser_details_tolerates_null_addresses(monkeypatch, tmp_path):
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', str(tmp_path))
+    scraper = SECFormADVScraper()
+    body = b'{"addresses": null, "phone": "555", "sicDescription": "Investment Advice"}'
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: _response(200, body))
+
+    details = scraper.get_adviser_details('1')
+
+    assert details['state'] == ''
+    assert details['phone'] == '555'
+    assert details['sic_description'] == 'Investment Advice'
+
+
+def test_details_cache_opens_lazily_and_closes(monkeypatch, tmp_path):
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', str(tmp_path))
+    body = b'{"addresses": {"business": {"city": "Boston", "stateOrCountry": "MA"}}}'
+
+    with SECFormADVScraper() as scraper:
+        assert not os.path.exists(tmp_path / 'submissions')
+
+        monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: _response(200, body))
+        assert scraper.get_adviser_details('1')['state'] == 'MA'
+        assert os.path.exists(tmp_path / 'submissions')
+
+        # Served from the cache without another request
+        monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: _response(500))
+        assert scraper.get_adviser_details('1')['city'] == 'Boston'
+
+    assert scraper._cache is None
+
+
+def test_retried_requests_stay_under_sec_cap(monkeypatch, tmp_path):
+    clock = _fake_clock(monkeypatch)
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', str(tmp_path))
+    scraper = SECFormADVScraper()
+
+    # Every URL is throttled once before it succeeds
+    sent, attempts = [], {}
+    def fake_get(url, **kwargs):
+        sent.append(clock[0])
+        attempts[url] = attempts.get(url, 0) + 1
+        return _response(503) if attempts[url] == 1 else _response(200, b'{}')
+    monkeypatch.setattr(scraper.session, 'get', fake_get)
+
+    for cik in range(20):
+        assert scraper.get_adviser_details(str(cik)) is not None
+
+    assert len(sent) == 40
+    assert _busiest_second(sent) <= SECFormADVScraper.SEC_CALLS_PER_SECOND
+
+
+def test_retry_honours_retry_after(monkeypatch, tmp_path):
+    clock = _fake_clock(monkeypatch)
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', str(tmp_path))
+    scraper = SECFormADVScraper()
+
+    throttled = _response(429)
+    throttled.headers['Retry-After'] = '2'
+    responses = [throttled, _response(200, b'{}')]
+    sent = []
+    def fake_get(url, **kwargs):
+        sent.append(clock[0])
+        return responses.pop(0)
+    monkeypatch.setattr(scraper.session, 'get', fake_get)
+
+    assert scraper.get_adviser_details('1') is not None
+    assert sent[1] - sent[0] >= 2.0
+
+
+def test_adviser_details_fetch_when_cache_dir_unusable(monkeypatch, capsys):
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', '/dev/null/cache')
+    scraper = SECFormADVScraper()
+    body = b'{"addresses": {"business": {"stateOrCountry": "NY"}}}'
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: _response(200, body))
+
+    assert scraper.get_adviser_details('1')['state'] == 'NY'
+    assert scraper.get_adviser_details('2')['state'] == 'NY'
+    assert capsys.readouterr().out.count('Details cache unavailable') == 1
+
+
+def test_adviser_details_fetch_when_cache_errors(monkeypatch):
+    class BrokenCache:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            pass
+
+        def get(self, key):
+            raise sqlite3.OperationalError('database is locked')
+
+        def set(self, key, value, expire=None):
+            raise sqlite3.OperationalError('database is locked')
+
+    scraper = SECFormADVScraper()
+    monkeypatch.setattr(scraper, '_cache', BrokenCache())
+    body = b'{"addresses": {"business": {"stateOrCountry": "NY"}}}'
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: _response(200, body))
+
+    assert scraper.get_adviser_details('1')['state'] == 'NY'
+
+
+def test_main_closes_scraper_when_enrichment_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(sec_scraper, '__file__', str(tmp_path / 'sec_scraper.py'))
+    monkeypatch.setattr(SECFormADVScraper, 'get_investment_advisers', lambda self, limit=200: [
+        {'cik': '1', 'name': 'Acme Capital', 'ticker': 'ACME'},
+    ])
+    monkeypatch.setattr(SECFormADVScraper, 'get_recent_13f_filers', lambda self, limit=100: [])
+
+    def fail(self, cik):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(SECFormADVScraper, 'get_adviser_details', fail)
+
+    closed = []
+    monkeypatch.setattr(SECFormADVScraper, 'close', lambda self: closed.append(self))
+
+    with pytest.raises(RuntimeError):
+        sec_scraper.main()
+    assert len(closed) == 1
+
+
+TICKERS = b'{"0": {"cik_str": 1, "ticker": "ACME", "title": "Acme Capital"}, "1": {"cik_str": 2, "ticker": "PLN", "title": "Plain Corp"}}'
+
+
+def test_company_tickers_without_writable_cache(monkeypatch):
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', '/dev/null/cache')
+    scraper = SECFormADVScraper()
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: _response(200, TICKERS))
+
+    assert [c['name'] for c in scraper.get_company_tickers()] == ['Acme Capital', 'Plain Corp']
+
+
+def test_company_tickers_refetch_when_cache_write_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', str(tmp_path))
+    scraper = SECFormADVScraper()
+    sent = []
+    def fake_get(url, **kwargs):
+        sent.append(kwargs)
+        return _response(200, TICKERS)
+    monkeypatch.setattr(scraper.session, 'get', fake_get)
+
+    def full_disk(src, dst):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(sec_scraper.os, 'replace', full_disk)
+
+    assert [c['cik'] for c in scraper.get_company_tickers()] == ['1', '2']
+    assert len(sent) == 2
+    assert not os.path.exists(tmp_path / 'company_tickers.json.tmp')
+
+
+def test_company_tickers_reuse_cache_on_304(monkeypatch, tmp_path):
+    monkeypatch.setattr(sec_scraper, 'CACHE_DIR', str(tmp_path))
+    scraper = SECFormADVScraper()
+
+    fresh = _response(200, TICKERS)
+    fresh.headers['ETag'] = '"v1"'
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: fresh)
+    assert len(list(scraper.get_company_tickers())) == 2
+
+    def not_modified(url, headers=None, **kwargs):
+        assert headers == {'If-None-Match': '"v1"'}
+        return _response(304)
+    monkeypatch.setattr(scraper.session, 'get', not_modified)
+    assert len(list(scraper.get_company_tickers())) == 2
+
+
+PRECEDENCE_CASES = [
+    # Earlier categories win even when a later keyword appears first
+    ('Acme Capital Family Trust', '', 'Family Office'),
+    ('Seed Wealth Partners', '', 'Venture Capital'),
+    ('Capital Buyout Group', '', 'Private Equity'),
+    ('Fund Offshore Ltd', '', 'Hedge Fund'),
+    ('Partners Wealth LLC', None, 'Asset Management'),
+    ('Apple Inc', 'Investment Advice', 'Investment Company'),
+    ('Plain Corp', 'Real Estate', 'Family Office'),
+    ('Plain Corp', 'Electronic Computers', 'Other Institutional'),
+]
+
+
+@pytest.mark.parametrize('name, sic_desc, expected', PRECEDENCE_CASES)
+def test_classify_investor_type_precedence(name, sic_desc, expected):
+    assert SECFormADVScraper().classify_investor_type(name, sic_desc) == expected
+
+
+def test_vectorized_classification_matches_scalar():
+    scraper = SECFormADVScraper()
+    names = pd.Series([name for name, _, _ in PRECEDENCE_CASES])
+    sic_descs = pd.Series([sic_desc for _, sic_desc, _ in PRECEDENCE_CASES])
+
+    vectorized = scraper.classify_investor_types(names, sic_descs).tolist()
+
+    assert vectorized == [scraper.classify_investor_type(n, s) for n, s in zip(names, sic_descs)]
+    assert vectorized == [expected for _, _, expected in PRECEDENCE_CASES]